@@ -1,13 +1,18 @@
+import csv
 import io
 import re
-from datetime import time
-from typing import Optional, Tuple
+from datetime import date, time
+from typing import Iterable, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 import streamlit as st
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
-from openpyxl.formatting.rule import FormulaRule
+import xlsxwriter
+from xlsxwriter.utility import xl_col_to_name
+
+# Copy-on-Write lets filtered frames be modified without defensive copies (always on from pandas 3)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.options.mode.copy_on_write = True
 
 # --- Employee mapping ---
 employees = {
@@ -17,9 +22,15 @@ employees = {
     24: "Faiza", 26: "Laiba", 29: "Ushna", 30: "Ali", 31: "Adnan", 32: "Yaseen",
     33: "Abbas"
 }
+EMPLOYEES_BY_ID = {str(k): v for k, v in employees.items()}
+EMPLOYEE_IDS = pd.Index(sorted(employees))  # UserID category order, so sorting by UserID is numeric
 
 CHECKIN_THRESHOLD = time(9, 2, 0)       # 9:02 AM
 CHECKOUT_THRESHOLD = time(17, 0, 0)     # 5:00 PM
+STATUS_LABELS = np.array(["On Time", "Late"])
+EARLY_LABELS = np.array(["No", "Yes"])
+ROW_HIGHLIGHTS = [("Status", "Late", "#FFCDD2"), ("Early Checkout", "Yes", "#FFF59D")]
+COUNT_HIGHLIGHTS = [("Total Lates", "#FFCDD2"), ("Total Early Checkout", "#FFF59D"), ("Total Leaves", "#BBDEFB")]
 
 # --- Streamlit setup ---
 st.set_page_config(page_title="Attendance Dashboard", page_icon="📊", layout="wide")
@@ -32,158 +43,280 @@ weekends_off = st.sidebar.checkbox("Ignore weekends (Sat/Sun)", value=False)
 uploaded = st.sidebar.file_uploader("Upload .dat / .txt / .csv file", type=["dat","txt","csv","log"])
 
 # --- Helpers ---
-CANDIDATE_USER_COLS = ["userid", "user_id", "pin", "enrollid", "empid", "id"]
-CANDIDATE_TIME_COLS = ["timestamp", "time", "datetime", "logtime", "punch time", "punch_time"]
+# In priority order: the first candidate present in the header wins
+CANDIDATE_USER_COLS = ("userid", "user_id", "pin", "enrollid", "empid", "id")
+CANDIDATE_TIME_COLS = ("timestamp", "time", "datetime", "logtime", "punch time", "punch_time")
+CSV_SEPARATORS = ["\t", ",", ";", "|"]
+SNIFF_CHARS = 8192
+_WS_RE = re.compile(r"\s+")
+PEEK_ROWS = 100
+CHUNK_ROWS = 200_000
+CHUNKED_READ_BYTES = 32 * 1024 * 1024  # larger uploads are read and reduced CHUNK_ROWS at a time
+# "ISO8601" covers every YYYY-MM-DD variant in one pass; the rest are tried in order on what's left
+TIMESTAMP_FORMATS = ["ISO8601", "%d/%m/%Y %H:%M:%S", "%m/%d/%Y %H:%M:%S", "%Y/%m/%d %H:%M:%S",
+                     "%d-%m-%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%m/%d/%Y %H:%M"]
 
-def _try_read_csv(buf: io.BytesIO) -> Optional[pd.DataFrame]:
+def _sniff_separator(buf: io.StringIO) -> Optional[str]:
     buf.seek(0)
-    for sep in ["\t", ",", ";", "|"]:
+    sample = buf.read(SNIFF_CHARS)
+    if "\n" in sample:
+        sample = sample[:sample.rindex("\n")]  # don't let a truncated last line skew the guess
+    try:
+        return csv.Sniffer().sniff(sample, delimiters="".join(CSV_SEPARATORS)).delimiter
+    except csv.Error:
+        return None
+
+def _try_read_csv(buf: io.StringIO) -> Optional[Tuple[pd.DataFrame, dict]]:
+    # Previews the first rows per separator: prefer one whose timestamp column parses,
+    # otherwise take the first with two or more columns
+    sniffed = _sniff_separator(buf)
+    seps = CSV_SEPARATORS if sniffed is None else [sniffed] + [s for s in CSV_SEPARATORS if s != sniffed]
+    fallback = None
+    for sep in seps:
         buf.seek(0)
         try:
-            df = pd.read_csv(buf, sep=sep, engine="python")
-            if df.shape[1] >= 2:
-                return df
+            head = pd.read_csv(buf, sep=sep, engine="c", nrows=PEEK_ROWS)
         except Exception:
-            pass
+            continue
+        if head.shape[1] < 2:
+            continue
+        if _has_timestamps(head):
+            return head, {"sep": sep}
+        fallback = fallback or (head, {"sep": sep})
+    if fallback is not None:
+        return fallback
     buf.seek(0)
     try:
-        return pd.read_csv(buf, delim_whitespace=True, engine="python", header=None)
+        return pd.read_csv(buf, sep=r"\s+", engine="c", header=None, nrows=PEEK_ROWS), {"sep": r"\s+", "header": None}
     except Exception:
         return None
 
-def _coerce_encoding(file_bytes: bytes) -> io.BytesIO:
+def _has_timestamps(head: pd.DataFrame) -> bool:
+    _, ts_col = _detect_columns(head)
+    return ts_col is not None and bool(_parse_timestamps(head[ts_col]).notna().any())
+
+def _read_columns(buf: io.StringIO, read_opts: dict, user_col, ts_col, chunked: bool) -> Optional[Iterable[pd.DataFrame]]:
+    # pyarrow's multithreaded reader first (it can't split on regex whitespace or stream chunks), then the C parser.
+    # ISO timestamps are parsed during the read; anything else is left as strings for _parse_timestamps.
+    # User IDs are held as Arrow strings (contiguous buffers) rather than Python str objects.
+    kwargs = dict(usecols=[user_col, ts_col], dtype={user_col: "string[pyarrow]"},
+                  parse_dates=[ts_col], date_format="ISO8601", **read_opts)
+    if chunked:
+        buf.seek(0)
+        try:
+            reader = pd.read_csv(buf, engine="c", chunksize=CHUNK_ROWS, **kwargs)
+        except Exception:
+            return None
+        return (chunk[[user_col, ts_col]] for chunk in reader)
+    engines = ["c"] if read_opts["sep"] == r"\s+" else ["pyarrow", "c"]
+    for engine in engines:
+        buf.seek(0)
+        try:
+            df = pd.read_csv(buf, engine=engine, **kwargs)
+            return [df[[user_col, ts_col]]]
+        except Exception:
+            pass
+    return None
+
+def _coerce_encoding(file_bytes: bytes) -> io.StringIO:
     try:
         text = file_bytes.decode("utf-8")
     except UnicodeDecodeError:
         text = file_bytes.decode("latin-1", errors="ignore")
-    return io.BytesIO(text.encode("utf-8"))
+    return io.StringIO(text)
 
 def _detect_columns(df: pd.DataFrame) -> Tuple[Optional[str], Optional[str]]:
     lower_cols = {c.lower(): c for c in df.columns.astype(str)}
-    user_col, ts_col = None, None
-    for k in CANDIDATE_USER_COLS:
-        if k in lower_cols:
-            user_col = lower_cols[k]; break
-    for k in CANDIDATE_TIME_COLS:
-        if k in lower_cols:
-            ts_col = lower_cols[k]; break
+    user_col = next((lower_cols[k] for k in CANDIDATE_USER_COLS if k in lower_cols), None)
+    ts_col = next((lower_cols[k] for k in CANDIDATE_TIME_COLS if k in lower_cols), None)
     if user_col is None and ts_col is None and df.shape[1] >= 2:
         user_col, ts_col = df.columns[0], df.columns[1]
     return user_col, ts_col
 
-def _extract_dataframe(file_bytes: bytes) -> pd.DataFrame:
-    buf = _coerce_encoding(file_bytes)
-    raw = _try_read_csv(buf)
-    if raw is None or raw.empty:
+def _parse_timestamps(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_dtype(values):
+        return values  # already parsed while reading (pyarrow infers ISO timestamps)
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        # Offset timestamps parse tz-aware; the rest of the pipeline works in the logged local time
+        return values.dt.tz_localize(None)
+    # Logs repeat the same timestamp strings a lot, so only the distinct values are parsed.
+    # Each known format is tried over all of them; later formats only see values still NaT.
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    s = pd.Series(uniques).astype(str).str.replace(_WS_RE, " ", regex=True).str.strip()
+    ts = pd.Series(pd.NaT, index=s.index, dtype="datetime64[ns]")
+    for fmt in TIMESTAMP_FORMATS + ["mixed"]:
+        missing = ts.isna()
+        if not missing.any():
+            break
+        # Values are already unique, so pandas' own per-call parse cache would be pure overhead
+        parsed = pd.to_datetime(s[missing], format=fmt, errors="coerce", cache=False)
+        if isinstance(parsed.dtype, pd.DatetimeTZDtype):
+            parsed = parsed.dt.tz_localize(None)  # keep the wall-clock time the device logged, not UTC
+        ts = ts.combine_first(parsed)
+    return pd.Series(ts.to_numpy()[codes], index=values.index)
+
+@st.cache_data(show_spinner=False)
+def _extract_dataframe(file_id: str, _file_bytes: bytes, weekends_off: bool) -> Tuple[pd.DataFrame, int]:
+    # Cached on the uploader's file_id; the leading underscore keeps Streamlit from hashing the bytes on every rerun
+    buf = _coerce_encoding(_file_bytes)
+    peeked = _try_read_csv(buf)
+    if peeked is None or peeked[0].empty:
         st.error("Could not parse the file. Check format or try another export.")
         st.stop()
-    if any(not isinstance(c, str) for c in raw.columns):
-        raw.columns = [f"col_{i+1}" for i in range(raw.shape[1])]
-    user_col, ts_col = _detect_columns(raw)
+    head, read_opts = peeked
+    labels = list(head.columns)
+    if any(not isinstance(c, str) for c in labels):
+        head.columns = [f"col_{i+1}" for i in range(head.shape[1])]
+    user_col, ts_col = _detect_columns(head)
     if user_col is None or ts_col is None:
-        st.error(f"Could not detect UserID/Timestamp columns. Found: {list(raw.columns)}")
+        st.error(f"Could not detect UserID/Timestamp columns. Found: {list(head.columns)}")
+        st.stop()
+    names = list(head.columns)
+    chunks = _read_columns(buf, read_opts, labels[names.index(user_col)], labels[names.index(ts_col)],
+                           chunked=len(_file_bytes) > CHUNKED_READ_BYTES)
+    read_rows, n_rows, parts = 0, 0, []
+    chunks = iter(chunks or [])
+    while True:
+        try:
+            chunk = next(chunks, None)
+        except pd.errors.ParserError:  # chunked reads only hit malformed lines as they reach them
+            read_rows, chunk = 0, None
+        if chunk is None:
+            break
+        read_rows += len(chunk)
+        punches, parsed = _clean_punches(chunk, weekends_off)
+        n_rows += parsed
+        parts.append(_first_last_punches(punches))
+    if read_rows == 0:
+        st.error("Could not parse the file. Check format or try another export.")
         st.stop()
-    df = raw[[user_col, ts_col]].copy()
+    return pd.concat(parts, ignore_index=True), n_rows
+
+def _clean_punches(df: pd.DataFrame, weekends_off: bool) -> Tuple[pd.DataFrame, int]:
     df.columns = ["UserID", "Timestamp"]
-    df["UserID"] = df["UserID"].astype(str).str.strip()
-
-    def parse_dt(x):
-        x = str(x).strip()
-        x = re.sub(r"\s+", " ", x)
-        for fmt in ("%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%m/%d/%Y %H:%M:%S",
-                    "%Y/%m/%d %H:%M:%S", "%d-%m-%Y %H:%M:%S", "%Y-%m-%d %H:%M",
-                    "%d/%m/%Y %H:%M", "%m/%d/%Y %H:%M"):
-            try:
-                return pd.to_datetime(x, format=fmt)
-            except Exception:
-                pass
-        return pd.to_datetime(x, errors="coerce")
-
-    df["Timestamp"] = df["Timestamp"].apply(parse_dt)
-    df = df.dropna(subset=["Timestamp"]).copy()
-    df["Date"] = df["Timestamp"].dt.date
+    # Unknown IDs get a missing category code
+    codes = EMPLOYEE_IDS.get_indexer(pd.to_numeric(df["UserID"], errors="coerce"))
+    df["UserID"] = pd.Categorical.from_codes(codes, categories=EMPLOYEE_IDS.astype(str))
+    df["Timestamp"] = _parse_timestamps(df["Timestamp"])
+    df = df.dropna(subset=["Timestamp"])
+    days = df["Timestamp"].to_numpy().astype("datetime64[D]")
+    df["Date"] = days  # midnight-floored, stays datetime64
     if weekends_off:
-        df = df[df["Timestamp"].dt.weekday < 5]
-    return df
+        # 1970-01-01 was a Thursday, so (days + 3) % 7 gives 0=Mon..6=Sun
+        df = df[(days.view("int64") + 3) % 7 < 5]
+    # Unknown IDs still count as parsed log rows, but only known employees' punches are kept
+    return df[df["UserID"].notna()], len(df)
+
+def _first_last_punches(df: pd.DataFrame) -> pd.DataFrame:
+    # Only each user's first and last punch of a day reach the summary, so later chunks (and the
+    # cached frame) carry at most two rows per user-day instead of every punch.
+    grouped = df.groupby(["UserID", "Date"], sort=False, observed=True)["Timestamp"]
+    return df.loc[np.union1d(grouped.idxmin(), grouped.idxmax())]
+
+def _time_of_day(t: time) -> np.timedelta64:
+    return pd.Timedelta(hours=t.hour, minutes=t.minute, seconds=t.second, microseconds=t.microsecond).to_timedelta64()
 
+def _status_kernel(check_in: np.ndarray, check_out: np.ndarray, late_at: np.timedelta64, early_at: np.timedelta64):
+    # Times of day as timedelta64 arrays; minute counts ignore seconds, the Late/Early flags don't.
+    minute = np.timedelta64(1, "m")
+    is_late = check_in > late_at
+    mins_late = np.maximum(0, check_in // minute - late_at // minute)
+    is_early = check_out < early_at
+    mins_early = np.maximum(0, early_at // minute - check_out // minute)
+    return is_late, mins_late, is_early, mins_early
+
+@st.cache_data(show_spinner=False)
 def _summarize_attendance(df: pd.DataFrame, late_t: time, early_checkout_t: time) -> pd.DataFrame:
-    first = df.groupby(["UserID", "Date"], as_index=False)["Timestamp"].min().rename(columns={"Timestamp": "CheckIn"})
-    last = df.groupby(["UserID", "Date"], as_index=False)["Timestamp"].max().rename(columns={"Timestamp": "CheckOut"})
-    merged = pd.merge(first, last, on=["UserID", "Date"], how="inner")
-    merged["UserID_int"] = pd.to_numeric(merged["UserID"], errors="coerce")
-    merged["Name"] = merged["UserID_int"].map(employees)
-    merged = merged.dropna(subset=["Name"]).copy()
+    merged = (
+        df.groupby(["UserID", "Date"], sort=False, observed=True)["Timestamp"]
+        .agg(CheckIn="min", CheckOut="max")
+        .reset_index()
+    )
+    # Mapping a categorical only maps its categories; then use the roster order for Name
+    merged["Name"] = merged["UserID"].map(EMPLOYEES_BY_ID).cat.set_categories(list(employees.values()))
+    is_late, mins_late, is_early, mins_early = _status_kernel(
+        (merged["CheckIn"] - merged["Date"]).to_numpy(),
+        (merged["CheckOut"] - merged["Date"]).to_numpy(),
+        _time_of_day(late_t),
+        _time_of_day(early_checkout_t),
+    )
+    merged["Status"] = STATUS_LABELS[is_late.view(np.uint8)]
+    merged["Minutes Late"] = mins_late
+    merged["Early Checkout"] = EARLY_LABELS[is_early.view(np.uint8)]
+    merged["Minutes Early"] = mins_early
+    merged = merged.sort_values(by=["UserID", "Date"])
     merged["CheckIn"] = merged["CheckIn"].dt.time
     merged["CheckOut"] = merged["CheckOut"].dt.time
-    merged["Status"] = merged["CheckIn"].apply(lambda t: "Late" if t > late_t else "On Time")
-    merged["Minutes Late"] = [
-        max(0, (t.hour - late_t.hour) * 60 + (t.minute - late_t.minute))
-        for t in merged["CheckIn"]
-    ]
-    merged["Early Checkout"] = merged["CheckOut"].apply(lambda t: "Yes" if t < early_checkout_t else "No")
-    merged["Minutes Early"] = [
-        max(0, (early_checkout_t.hour - t.hour) * 60 + (early_checkout_t.minute - t.minute))
-        for t in merged["CheckOut"]
-    ]
-    merged = merged.sort_values(by=["UserID_int", "Date"])
-    merged.drop(columns=["UserID_int"], inplace=True)
     return merged[["UserID", "Name", "Date", "CheckIn", "CheckOut", "Status", "Minutes Late", "Early Checkout", "Minutes Early"]]
 
+@st.cache_data(show_spinner=False)
+def _summarize_counts(flags: pd.DataFrame) -> pd.DataFrame:
+    # flags: Name, Date and the _is_late/_is_early booleans of each summary row.
+    # Name is categorical over the whole roster, so observed=False keeps employees with no records
+    counts = flags.groupby("Name", observed=False).agg(**{
+        "Total Lates": ("_is_late", "sum"),
+        "Total Early Checkout": ("_is_early", "sum"),
+        "Days Present": ("Date", "nunique"),
+    })
+
+    # Leaves
+    counts["Total Leaves"] = flags["Date"].nunique() - counts.pop("Days Present")
+    return counts.reset_index()
+
+def _highlight_positive(col: pd.Series, color: str) -> np.ndarray:
+    return np.where(col.to_numpy() > 0, f"background-color: {color}", "")
+
+@st.cache_data(show_spinner=False)
 def _to_styled_excel(df: pd.DataFrame) -> bytes:
-    bio = io.BytesIO()
-    df.to_excel(bio, index=False, sheet_name="Attendance")
-    bio.seek(0)
-    wb = load_workbook(bio)
-    ws = wb.active
-    header = [c.value for c in ws[1]]
+    out = io.BytesIO()
+    wb = xlsxwriter.Workbook(out, {"constant_memory": True})
+    ws = wb.add_worksheet("Attendance")
+    header = list(df.columns)
+
+    header_fmt = wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+    cell_fmts = {date: wb.add_format({"num_format": "yyyy-mm-dd"}), time: wb.add_format({"num_format": "h:mm:ss"})}
+
+    # constant_memory mode flushes each row once the next starts, so write strictly row by row
+    ws.write_row(0, 0, header, header_fmt)
+    for r, row in enumerate(df.itertuples(index=False, name=None), start=1):
+        for c, v in enumerate(row):
+            ws.write(r, c, v, cell_fmts.get(type(v)))
+
+    # Adjust column widths; date/time cells render at a fixed width, so they aren't stringified
+    for c, col in enumerate(header):
+        if len(df) and type(df[col].iloc[0]) in cell_fmts:
+            max_len = max(len(str(col)), len("yyyy-mm-dd"))
+        else:
+            max_len = max(len(str(col)), int(df[col].astype(str).str.len().max()) if len(df) else 0)
+        ws.set_column(c, c, min(max(12, max_len + 2), 40))
 
     # --- Conditional formatting ---
-    red = PatternFill(start_color="FFCDD2", end_color="FFCDD2", fill_type="solid")
-    yellow = PatternFill(start_color="FFF59D", end_color="FFF59D", fill_type="solid")
-    blue = PatternFill(start_color="BBDEFB", end_color="BBDEFB", fill_type="solid")
-
-    last_row = ws.max_row
-    last_col_letter = ws.cell(row=1, column=ws.max_column).column_letter
-
-    # Late
-    if "Status" in header:
-        idx = header.index("Status") + 1
-        col_letter = ws.cell(row=1, column=idx).column_letter
-        rule = FormulaRule(formula=[f'${col_letter}2="Late"'], fill=red)
-        ws.conditional_formatting.add(f"A2:{last_col_letter}{last_row}", rule)
-    # Early Checkout
-    if "Early Checkout" in header:
-        idx = header.index("Early Checkout") + 1
-        col_letter = ws.cell(row=1, column=idx).column_letter
-        rule = FormulaRule(formula=[f'${col_letter}2="Yes"'], fill=yellow)
-        ws.conditional_formatting.add(f"A2:{last_col_letter}{last_row}", rule)
-
-    # Adjust column widths
-    for col in ws.columns:
-        max_len, col_letter = 0, col[0].column_letter
-        for cell in col:
-            v = "" if cell.value is None else str(cell.value)
-            max_len = max(max_len, len(v))
-        ws.column_dimensions[col_letter].width = min(max(12, max_len + 2), 40)
+    col_letters = {name: xl_col_to_name(i) for i, name in enumerate(header)}
+    for col, value, color in ROW_HIGHLIGHTS:
+        if col in col_letters:
+            ws.conditional_format(1, 0, len(df), len(header) - 1,
+                                  {"type": "formula", "criteria": f'=${col_letters[col]}2="{value}"',
+                                   "format": wb.add_format({"bg_color": color})})
 
-    out = io.BytesIO()
-    wb.save(out)
+    wb.close()
     out.seek(0)
     return out.read()
 
 # --- Main Flow ---
 if uploaded:
-    file_bytes = uploaded.read()
-    df_raw = _extract_dataframe(file_bytes)
-    st.success(f"Parsed {len(df_raw):,} log rows successfully!")
+    df_raw, n_rows = _extract_dataframe(uploaded.file_id, uploaded.getvalue(), weekends_off)
+    st.success(f"Parsed {n_rows:,} log rows successfully!")
 
     summary = _summarize_attendance(df_raw, CHECKIN_THRESHOLD, CHECKOUT_THRESHOLD)
 
     # --- Metrics ---
+    # Status is always "Late" or "On Time", so one comparison per flag serves every count below
+    is_late = summary["Status"].to_numpy() == "Late"
+    is_early = summary["Early Checkout"].to_numpy() == "Yes"
     total_logs = len(summary)
-    total_late = (summary["Status"] == "Late").sum()
-    total_on_time = (summary["Status"] == "On Time").sum()
-    total_early = (summary["Early Checkout"] == "Yes").sum()
+    total_late = int(is_late.sum())
+    total_on_time = total_logs - total_late
+    total_early = int(is_early.sum())
 
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("📄 Total Records", f"{total_logs}")
@@ -193,12 +326,15 @@ if uploaded:
 
     st.markdown("---")
 
+    # Date stays datetime64 for the aggregations; show it as plain dates
+    summary_display = summary.assign(Date=summary["Date"].dt.date)
+
     # --- Detailed Attendance ---
     with st.expander("🗂️ View Detailed Attendance Table"):
-        st.dataframe(summary)
+        st.dataframe(summary_display)
 
     # --- Download Excel ---
-    excel_bytes = _to_styled_excel(summary)
+    excel_bytes = _to_styled_excel(summary_display)
     st.download_button(
         "⬇️ Download Excel",
         data=excel_bytes,
@@ -209,30 +345,12 @@ if uploaded:
     st.markdown("---")
 
     # --- Summary Counts ---
-    late_counts = summary.groupby("Name")["Status"].apply(lambda x: (x=="Late").sum()).reset_index().rename(columns={"Status":"Total Lates"})
-    early_counts = summary.groupby("Name")["Early Checkout"].apply(lambda x: (x=="Yes").sum()).reset_index().rename(columns={"Early Checkout":"Total Early Checkout"})
-
-    # Leaves
-    dates_in_data = summary["Date"].unique()
-    all_data = pd.MultiIndex.from_product([employees.values(), dates_in_data], names=["Name","Date"])
-    full_df = pd.DataFrame(index=all_data).reset_index()
-    merged_summary = pd.merge(full_df, summary[["Name","Date"]], on=["Name","Date"], how="left", indicator=True)
-    leave_counts = merged_summary.groupby("Name")["_merge"].apply(lambda x: (x=="left_only").sum()).reset_index().rename(columns={"_merge":"Total Leaves"})
-
-    # Merge all counts
-    summary_counts = pd.DataFrame({"Name": list(employees.values())})
-    summary_counts = summary_counts.merge(late_counts, on="Name", how="left").fillna(0)
-    summary_counts = summary_counts.merge(early_counts, on="Name", how="left").fillna(0)
-    summary_counts = summary_counts.merge(leave_counts, on="Name", how="left").fillna(0)
-    summary_counts[["Total Lates","Total Early Checkout","Total Leaves"]] = summary_counts[["Total Lates","Total Early Checkout","Total Leaves"]].astype(int)
+    flags = summary[["Name", "Date"]].assign(_is_late=is_late, _is_early=is_early)
+    summary_counts = _summarize_counts(flags)
 
     # --- Display Summary Table with Correct Highlighting ---
     with st.expander("📋 Total Late, Early Checkout & Leave Count of Employees"):
-        def highlight_counts(row):
-            return [
-                "",  # Name
-                'background-color: #FFCDD2' if row["Total Lates"] > 0 else '',
-                'background-color: #FFF59D' if row["Total Early Checkout"] > 0 else '',
-                'background-color: #BBDEFB' if row["Total Leaves"] > 0 else ''
-            ]
-        st.dataframe(summary_counts.style.apply(highlight_counts, axis=1))
+        styled = summary_counts.style
+        for col, color in COUNT_HIGHLIGHTS:
+            styled = styled.apply(_highlight_positive, subset=[col], color=color)
+        st.dataframe(styled)